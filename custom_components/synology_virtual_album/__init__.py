@@ -5,8 +5,9 @@ from homeassistant.const import Platform
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.typing import ConfigType
 
+from .const import CONF_SYNOLOGY_DSM
 from .services import setup_services
-from .synology_photos import SynologyPhotos, create_store
+from .synology_photos import SynologyPhotos, create_store, invalidate_album_cache
 
 PLATFORMS: list[Platform] = [Platform.DEVICE_TRACKER, Platform.SENSOR]
 
@@ -36,6 +37,7 @@ async def async_unload_entry(
 ) -> bool:
     """Unload a config entry."""
     await entry.runtime_data.shutdown()
+    invalidate_album_cache(entry.data.get(CONF_SYNOLOGY_DSM))
     return await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
 
 
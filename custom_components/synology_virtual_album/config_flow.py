@@ -1,4 +1,4 @@
-import re
+import string
 from typing import Any
 
 import voluptuous as vol
@@ -22,42 +22,51 @@ from .const import (
     CONF_VIRTUAL_ALBUM_ID,
     CONF_VIRTUAL_ALBUM_NAME,
     CONF_WEEKLY_IMAGES,
+    DEFAULT_DAILY_IMAGES,
+    DEFAULT_MAX_ALBUM_IMAGES,
+    DEFAULT_WEEKLY_IMAGES,
     DOMAIN,
 )
-from .synology_photos import get_photos
+from .synology_photos import get_albums_cached
 
 
-async def _build_schema(hass, options: dict[str, Any]) -> vol.Schema:
-    if dsm_device_id := options.get(CONF_SYNOLOGY_DSM):
-        photos = get_photos(hass, dsm_device_id)
-        albums = await photos.get_albums()
+class _CleanNameTable(dict[int, str]):
+    """A str.translate table that deletes any character it doesn't have an entry for."""
 
-    all_albums = [
-        selector.SelectOptionDict(value=str(album.album_id), label=album.name)
-        for album in albums
-    ]
+    def __missing__(self, key: int) -> None:
+        return None
+
+
+# Lowercases letters, turns spaces into underscores, keeps digits and underscores, and drops everything else
+_CLEAN_NAME_TABLE = _CleanNameTable(
+    {ord(c): c for c in string.ascii_lowercase + string.digits + "_"}
+)
+_CLEAN_NAME_TABLE.update({ord(c.upper()): c for c in string.ascii_lowercase})
+_CLEAN_NAME_TABLE[ord(" ")] = "_"
+
+OPTIONS_MENU: list[str] = ["options_basic", "options_albums", "finish"]
+
+DEFAULT_OPTIONS: dict[str, Any] = {
+    CONF_MAX_ALBUM_IMAGES: DEFAULT_MAX_ALBUM_IMAGES,
+    CONF_DAILY_IMAGES: DEFAULT_DAILY_IMAGES,
+    CONF_WEEKLY_IMAGES: DEFAULT_WEEKLY_IMAGES,
+}
 
+
+def _build_basic_schema() -> vol.Schema:
     return vol.Schema(
         {
-            vol.Optional(CONF_SOURCE_ALBUMS): selector.SelectSelector(
-                {
-                    "options": all_albums,
-                    "mode": "dropdown",
-                    "multiple": True,
-                    "sort": True,
-                }
-            ),
             vol.Optional(
                 CONF_MAX_ALBUM_IMAGES,
-                default=150,
+                default=DEFAULT_MAX_ALBUM_IMAGES,
             ): selector.NumberSelector({"min": 1}),
             vol.Optional(
                 CONF_DAILY_IMAGES,
-                default=50,
+                default=DEFAULT_DAILY_IMAGES,
             ): selector.NumberSelector({"min": 0}),
             vol.Optional(
                 CONF_WEEKLY_IMAGES,
-                default=30,
+                default=DEFAULT_WEEKLY_IMAGES,
             ): selector.NumberSelector({"min": 0}),
             vol.Optional(
                 CONF_CURRENT_IMAGE,
@@ -66,24 +75,62 @@ async def _build_schema(hass, options: dict[str, Any]) -> vol.Schema:
     )
 
 
+async def _get_album_options(
+    hass, options: dict[str, Any]
+) -> list[selector.SelectOptionDict] | None:
+    """Returns the albums to pick from, or None if they couldn't be read from the DSM."""
+    if not (dsm_device_id := options.get(CONF_SYNOLOGY_DSM)):
+        return None
+
+    if (albums := await get_albums_cached(hass, dsm_device_id)) is None:
+        return None
+
+    return [
+        selector.SelectOptionDict(value=str(album.album_id), label=album.name)
+        for album in albums
+    ]
+
+
+def _build_albums_schema(all_albums: list[selector.SelectOptionDict]) -> vol.Schema:
+    return vol.Schema(
+        {
+            vol.Optional(CONF_SOURCE_ALBUMS): selector.SelectSelector(
+                {
+                    "options": all_albums,
+                    "mode": "dropdown",
+                    "multiple": True,
+                    "sort": True,
+                }
+            ),
+        }
+    )
+
+
+def _apply_basic_options(options: dict[str, Any], user_input: dict[str, Any]) -> None:
+    # The current image entity is optional, so make sure clearing it in the form removes it
+    options.pop(CONF_CURRENT_IMAGE, None)
+    options.update(user_input)
+
+
+def _apply_album_options(options: dict[str, Any], user_input: dict[str, Any]) -> None:
+    options[CONF_SOURCE_ALBUMS] = user_input.get(CONF_SOURCE_ALBUMS, [])
+
+
 class SynoVirtualAlbumConfigFlow(ConfigFlow, domain=DOMAIN):
     """Configuration flow."""
 
     VERSION = 1
 
     def __init__(self) -> None:
-        self.config_data: dict[str, Any] = {}
+        self.config_data: dict[str, Any] = dict(DEFAULT_OPTIONS)
+        self._albums_cache: list[selector.SelectOptionDict] | None = None
 
     def _clean_name(self, name: str) -> str:
         """Returns a cleaned up version of the album name, suitable for unique ids or entity ids.
 
         TODO: Seems like there's probably a HA function to accomplish this already.
         """
-        # First pass, lowercase and replace any spaces with underscores
-        lower_name = name.lower().replace(" ", "_")
-
-        # Remove anything non-alphanumeric or underscore, and strip any leading or trailing underscores
-        return re.sub(r"[^\da-z_]", "", lower_name).strip("_")
+        return name.translate(_CLEAN_NAME_TABLE).strip("_")
 
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
@@ -114,14 +161,50 @@ class SynoVirtualAlbumConfigFlow(ConfigFlow, domain=DOMAIN):
 
     async def async_step_options(
         self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        return self.async_show_menu(step_id="options", menu_options=OPTIONS_MENU)
+
+    async def async_step_options_basic(
+        self, user_input: dict[str, Any] | None = None
     ) -> ConfigFlowResult:
         if user_input is None:
-            data_schema = await _build_schema(self.hass, self.config_data)
+            return self.async_show_form(
+                step_id="options_basic",
+                data_schema=self.add_suggested_values_to_schema(
+                    _build_basic_schema(), self.config_data
+                ),
+            )
 
-            return self.async_show_form(step_id="options", data_schema=data_schema)
+        _apply_basic_options(self.config_data, user_input)
+        return await self.async_step_options()
 
-        self.config_data.update(user_input)
+    async def async_step_options_albums(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        # Only accept a selection made from albums that were actually read
+        if user_input is not None and self._albums_cache is not None:
+            _apply_album_options(self.config_data, user_input)
+            return await self.async_step_options()
+
+        # Only talk to the DSM once the album page is actually opened, and keep the result for this flow. If reading
+        # the albums failed, submitting the form tries again.
+        errors: dict[str, str] = {}
+        if self._albums_cache is None:
+            self._albums_cache = await _get_album_options(self.hass, self.config_data)
+            if self._albums_cache is None:
+                errors["base"] = "cannot_connect"
+
+        return self.async_show_form(
+            step_id="options_albums",
+            data_schema=self.add_suggested_values_to_schema(
+                _build_albums_schema(self._albums_cache or []), self.config_data
+            ),
+            errors=errors,
+        )
 
+    async def async_step_finish(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
         title = "Synology Virtual Album " + self.config_data.get(
             CONF_VIRTUAL_ALBUM_NAME
         )
@@ -138,32 +221,69 @@ class SynoVirtualAlbumConfigFlow(ConfigFlow, domain=DOMAIN):
 
 
 class SynoVirtualAlbumOptionsFlow(OptionsFlowWithReload):
+    def __init__(self) -> None:
+        self._options: dict[str, Any] | None = None
+        self._albums_cache: list[selector.SelectOptionDict] | None = None
+
     async def async_step_init(
         self, user_input: dict[str, Any] | None = None
     ) -> ConfigFlowResult:
         """Manage the options."""
-        if user_input is not None:
-            # All the options are allowed to be set in the base config, this is really just a reconfigure. So, copy
-            # over the options we don't allow to be changed and update the base config with the new settings, then
-            # return empty options.
-            base_entries = (
-                CONF_SYNOLOGY_DSM,
-                CONF_VIRTUAL_ALBUM_NAME,
-                CONF_VIRTUAL_ALBUM_ID,
-            )
-            for entry in base_entries:
-                user_input[entry] = self.config_entry.data.get(entry)
+        if self._options is None:
+            self._options = dict(self.config_entry.data)
 
-            self.hass.config_entries.async_update_entry(
-                self.config_entry, data=user_input
+        return self.async_show_menu(step_id="init", menu_options=OPTIONS_MENU)
+
+    async def async_step_options_basic(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        if user_input is None:
+            return self.async_show_form(
+                step_id="options_basic",
+                data_schema=self.add_suggested_values_to_schema(
+                    _build_basic_schema(), self._options
+                ),
             )
-            return self.async_create_entry(data={})
 
-        data_schema = await _build_schema(self.hass, self.config_entry.data)
+        _apply_basic_options(self._options, user_input)
+        return await self.async_step_init()
+
+    async def async_step_options_albums(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        if user_input is not None and self._albums_cache is not None:
+            _apply_album_options(self._options, user_input)
+            return await self.async_step_init()
+
+        errors: dict[str, str] = {}
+        if self._albums_cache is None:
+            self._albums_cache = await _get_album_options(self.hass, self._options)
+            if self._albums_cache is None:
+                errors["base"] = "cannot_connect"
 
         return self.async_show_form(
-            step_id="init",
+            step_id="options_albums",
             data_schema=self.add_suggested_values_to_schema(
-                data_schema, self.config_entry.data
+                _build_albums_schema(self._albums_cache or []), self._options
             ),
+            errors=errors,
+        )
+
+    async def async_step_finish(
+        self, user_input: dict[str, Any] | None = None
+    ) -> ConfigFlowResult:
+        # All the options are allowed to be set in the base config, this is really just a reconfigure. So, copy over
+        # the options we don't allow to be changed and update the base config with the new settings, then return
+        # empty options.
+        base_entries = (
+            CONF_SYNOLOGY_DSM,
+            CONF_VIRTUAL_ALBUM_NAME,
+            CONF_VIRTUAL_ALBUM_ID,
+        )
+        for entry in base_entries:
+            self._options[entry] = self.config_entry.data.get(entry)
+
+        self.hass.config_entries.async_update_entry(
+            self.config_entry, data=self._options
         )
+        return self.async_create_entry(data={})
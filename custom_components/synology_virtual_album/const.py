@@ -12,5 +12,9 @@ CONF_CURRENT_IMAGE: Final = "wallpanel_image_url_entity"
 CONF_MAX_ALBUM_IMAGES: Final = "max_album_images"
 CONF_DAILY_IMAGES: Final = "daily_images"
 CONF_WEEKLY_IMAGES: Final = "weekly_images"
+DEFAULT_MAX_ALBUM_IMAGES: Final = 150
+DEFAULT_DAILY_IMAGES: Final = 50
+DEFAULT_WEEKLY_IMAGES: Final = 30
 SERVICE_REBUILD_VIRTUAL_ALBUM: Final = "rebuild_virtual_album"
-EVENT_CURRENT_PHOTO_CHANGED: Final = "synology_virtual_album_current_photo_changed"
+# Dispatcher signal sent when the current photo changes, formatted with the virtual album id
+SIGNAL_CURRENT_PHOTO_CHANGED: Final = "synology_virtual_album_{}_current_photo_changed"
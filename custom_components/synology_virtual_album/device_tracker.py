@@ -2,19 +2,28 @@
 
 from __future__ import annotations
 
+import logging
+
 from homeassistant.components.device_tracker import TrackerEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import Event, EventStateChangedData, HomeAssistant, callback
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddConfigEntryEntitiesCallback
 
 from .const import (
     CONF_CURRENT_IMAGE,
     CONF_VIRTUAL_ALBUM_ID,
     CONF_VIRTUAL_ALBUM_NAME,
-    EVENT_CURRENT_PHOTO_CHANGED,
+    SIGNAL_CURRENT_PHOTO_CHANGED,
 )
 
-ADDRESS_ATTRS = [
+_LOGGER = logging.getLogger(__name__)
+
+# How long to wait before writing state again, so quickly skipping through photos doesn't write every one
+WRITE_COOLDOWN_SECONDS = 0.25
+
+ADDRESS_ATTRS = (
     "country",
     "state",
     "county",
@@ -24,7 +33,7 @@ ADDRESS_ATTRS = [
     "village",
     "route",
     "landmark",
-]
+)
 
 
 async def async_setup_entry(
@@ -49,24 +58,41 @@ class CurrentPhotoDeviceTracker(TrackerEntity):
             "album_name": config_entry.data.get(CONF_VIRTUAL_ALBUM_NAME)
         }
         self._attr_extra_state_attributes = dict.fromkeys(ADDRESS_ATTRS)
+        self._signal = SIGNAL_CURRENT_PHOTO_CHANGED.format(
+            config_entry.data.get(CONF_VIRTUAL_ALBUM_ID)
+        )
+        self._write_debouncer = Debouncer(
+            hass,
+            _LOGGER,
+            cooldown=WRITE_COOLDOWN_SECONDS,
+            immediate=True,
+            function=self.async_write_ha_state,
+        )
 
-        hass.bus.async_listen(
-            EVENT_CURRENT_PHOTO_CHANGED, self._async_update_image_location
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to current photo changes for this album."""
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass, self._signal, self._async_update_image_location
+            )
         )
+        self.async_on_remove(self._write_debouncer.async_cancel)
 
     @callback
-    def _async_update_image_location(self, event: Event[EventStateChangedData]) -> None:
+    def _async_update_image_location(self, photo_info: dict) -> None:
         # First clear out all the attributes, so if this image doesn't have any of them they won't be using old values
         self._attr_latitude = self._attr_longitude = None
-        self._attr_extra_state_attributes = dict.fromkeys(ADDRESS_ATTRS)
+        address = None
 
-        if additional := event.data.get("additional"):
+        if additional := photo_info.get("additional"):
             if gps := additional.get("gps"):
                 self._attr_latitude = gps.get("latitude")
                 self._attr_longitude = gps.get("longitude")
-            if address := additional.get("address"):
-                self._attr_extra_state_attributes = {
-                    attr: address.get(attr) for attr in ADDRESS_ATTRS
-                }
+            address = additional.get("address")
+
+        # The attributes dict is allocated once and updated in place
+        attributes = self._attr_extra_state_attributes
+        for attr in ADDRESS_ATTRS:
+            attributes[attr] = address.get(attr) if address else None
 
-        self.async_write_ha_state()
+        self._write_debouncer.async_schedule_call()
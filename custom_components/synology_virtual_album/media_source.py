@@ -2,20 +2,30 @@
 
 from __future__ import annotations
 
+import asyncio
+from functools import cached_property
 from logging import getLogger
-import mimetypes
 from typing import TYPE_CHECKING
 
-from homeassistant.components.media_player import MediaClass
+from homeassistant.components.media_player import BrowseError, MediaClass
 from homeassistant.components.media_source import (
     BrowseMediaSource,
     MediaSource,
     MediaSourceItem,
 )
+from homeassistant.components.synology_dsm import SynologyDSMConfigEntry
 from homeassistant.components.synology_dsm.const import SHARED_SUFFIX
 from homeassistant.components.synology_dsm.media_source import SynologyPhotosMediaSource
-from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.config_entries import (
+    SIGNAL_CONFIG_ENTRY_CHANGED,
+    ConfigEntry,
+    ConfigEntryChange,
+    ConfigEntryState,
+)
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.device_registry import EventDeviceRegistryUpdatedData
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.event import async_track_device_registry_updated_event
 
 if TYPE_CHECKING:
     from . import SynologyVirtualAlbumConfigEntry
@@ -26,17 +36,21 @@ from .const import (
     CONF_VIRTUAL_ALBUM_NAME,
     DOMAIN,
 )
+from .synology_dsm_photos_ex import SynoPhotosItemEx
 from .synology_photos import get_dsm_config
 
 LOGGER = getLogger(__name__)
 
+# The number of images returned for each page of a browsed album
+ALBUM_PAGE_SIZE = 50
+
+# The maximum number of thumbnail requests to have in flight at once when browsing an album
+MAX_CONCURRENT_THUMBNAILS = 8
+
 
 async def async_get_media_source(hass: HomeAssistant) -> MediaSource:
     """Set up Synology media source."""
-    entries = hass.config_entries.async_entries(
-        DOMAIN, include_disabled=False, include_ignore=False
-    )
-    return SynologyVirtualAlbumMediaSource(hass, entries)
+    return SynologyVirtualAlbumMediaSource(hass)
 
 
 class SynologyVirtualAlbumMediaSource(SynologyPhotosMediaSource):
@@ -44,10 +58,61 @@ class SynologyVirtualAlbumMediaSource(SynologyPhotosMediaSource):
 
     name = "Synology Virtual Album"
 
-    def __init__(self, hass: HomeAssistant, entries: list[ConfigEntry]) -> None:
+    def __init__(self, hass: HomeAssistant) -> None:
         """Initialize virtual album source."""
-        super().__init__(hass, entries)
+        # The base class takes the entries up front. Give it none and look ours up the first time they're needed
+        super().__init__(hass, [])
         self.domain = DOMAIN
+        self._dsm_config_cache: dict[str, SynologyDSMConfigEntry] = {}
+        self._dsm_device_listeners: set[str] = set()
+
+        async_dispatcher_connect(
+            hass, SIGNAL_CONFIG_ENTRY_CHANGED, self._async_config_entry_changed
+        )
+
+    @cached_property
+    def _entries(self) -> list[ConfigEntry]:
+        """The loadable virtual album config entries."""
+        return self.hass.config_entries.async_entries(
+            DOMAIN, include_disabled=False, include_ignore=False
+        )
+
+    @cached_property
+    def _entries_by_id(self) -> dict[str, SynologyVirtualAlbumConfigEntry]:
+        return {entry.data.get(CONF_VIRTUAL_ALBUM_ID): entry for entry in self._entries}
+
+    @callback
+    def _async_config_entry_changed(
+        self, change: ConfigEntryChange, entry: ConfigEntry
+    ) -> None:
+        if entry.domain == DOMAIN:
+            # Drop the cached entries, they'll be looked up again on the next browse
+            self.__dict__.pop("_entries", None)
+            self.__dict__.pop("_entries_by_id", None)
+
+    def _get_dsm_config(self, dsm_device_id: str) -> SynologyDSMConfigEntry | None:
+        """Returns the DSM config for a device, remembering it until the device changes."""
+        if dsm_config := self._dsm_config_cache.get(dsm_device_id):
+            return dsm_config
+
+        if not (dsm_config := get_dsm_config(self.hass, dsm_device_id)):
+            return None
+
+        self._dsm_config_cache[dsm_device_id] = dsm_config
+
+        if dsm_device_id not in self._dsm_device_listeners:
+            self._dsm_device_listeners.add(dsm_device_id)
+            async_track_device_registry_updated_event(
+                self.hass, dsm_device_id, self._async_dsm_device_updated
+            )
+
+        return dsm_config
+
+    @callback
+    def _async_dsm_device_updated(
+        self, event: Event[EventDeviceRegistryUpdatedData]
+    ) -> None:
+        self._dsm_config_cache.pop(event.data["device_id"], None)
 
     async def async_browse_media(
         self,
@@ -84,56 +149,81 @@ class SynologyVirtualAlbumMediaSource(SynologyPhotosMediaSource):
                     can_play=False,
                     can_expand=True,
                 )
-                for entry in self.entries
+                for entry in self._entries
             ]
 
-        entry: SynologyVirtualAlbumConfigEntry | None = next(
-            (
-                entry
-                for entry in self.hass.config_entries.async_entries(DOMAIN)
-                if entry.data.get(CONF_VIRTUAL_ALBUM_ID) == item.identifier
-            ),
-            None,
+        # Pages after the first are identified as [virtual_album_id]/[page]
+        album_id, _, page_str = item.identifier.partition("/")
+        if not page_str:
+            page = 0
+        elif page_str.isdigit():
+            page = int(page_str)
+        else:
+            raise BrowseError(f"Invalid album page: {item.identifier}")
+
+        if (entry := self._entries_by_id.get(album_id)) is None:
+            raise BrowseError(f"Virtual album not found: {album_id}")
+        if entry.state is not ConfigEntryState.LOADED:
+            raise BrowseError(f"Virtual album not loaded: {album_id}")
+
+        if not (dsm_device_id := entry.data.get(CONF_SYNOLOGY_DSM)) or not (
+            dsm_config := self._get_dsm_config(dsm_device_id)
+        ):
+            raise BrowseError(f"Diskstation not found for virtual album: {album_id}")
+
+        album_items = await entry.runtime_data.get_virtual_album_items(images_only=True)
+        page_start = page * ALBUM_PAGE_SIZE
+        page_end = page_start + ALBUM_PAGE_SIZE
+        page_items = album_items[page_start:page_end]
+
+        # Force small small thumbnails
+        for album_item in page_items:
+            album_item.thumbnail_size = "sm"
+
+        # Look up the thumbnails concurrently, but limit how many requests we have in flight at once
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_THUMBNAILS)
+
+        async def get_thumbnail(album_item: SynoPhotosItemEx) -> str | None:
+            async with semaphore:
+                return await self.async_get_thumbnail(
+                    album_item, dsm_config.runtime_data
+                )
+
+        thumbnails = await asyncio.gather(
+            *(get_thumbnail(album_item) for album_item in page_items)
         )
 
-        assert entry
-        assert entry.runtime_data is not None
-
-        dsm_device_id = entry.data.get(CONF_SYNOLOGY_DSM)
-        assert dsm_device_id
-        dsm_config = get_dsm_config(self.hass, dsm_device_id)
-        assert dsm_config
-
-        album_items = await entry.runtime_data.get_virtual_album_items()
-
-        ret = []
-
-        for album_item in album_items:
-            mime_type, _ = mimetypes.guess_type(album_item.file_name)
-            if isinstance(mime_type, str) and mime_type.startswith("image/"):
-                # Force small small thumbnails
-                album_item.thumbnail_size = "sm"
-                suffix = ""
-                if album_item.is_shared:
-                    suffix = SHARED_SUFFIX
-                ret.append(
-                    BrowseMediaSource(
-                        domain=DOMAIN,
-                        identifier=(
-                            f"{dsm_config.unique_id}/"
-                            f"{album_item.source_album_id}_{album_item.passphrase}/"
-                            f"{album_item.thumbnail_cache_key}/"
-                            f"{album_item.file_name}{suffix}"
-                        ),
-                        media_class=MediaClass.IMAGE,
-                        media_content_type=mime_type,
-                        title=album_item.file_name,
-                        can_play=True,
-                        can_expand=False,
-                        thumbnail=await self.async_get_thumbnail(
-                            album_item, dsm_config.runtime_data
-                        ),
-                    ),
+        ret = [
+            BrowseMediaSource(
+                domain=DOMAIN,
+                identifier=(
+                    f"{dsm_config.unique_id}/"
+                    f"{album_item.source_album_id}_{album_item.passphrase}/"
+                    f"{album_item.thumbnail_cache_key}/"
+                    f"{album_item.file_name}"
+                    f"{SHARED_SUFFIX if album_item.is_shared else ''}"
+                ),
+                media_class=MediaClass.IMAGE,
+                media_content_type=album_item.mime_type,
+                title=album_item.file_name,
+                can_play=True,
+                can_expand=False,
+                thumbnail=thumbnail,
+            )
+            for album_item, thumbnail in zip(page_items, thumbnails, strict=True)
+        ]
+
+        if len(album_items) > page_end:
+            ret.append(
+                BrowseMediaSource(
+                    domain=DOMAIN,
+                    identifier=f"{album_id}/{page + 1}",
+                    media_class=MediaClass.DIRECTORY,
+                    media_content_type=MediaClass.IMAGE,
+                    title="Next page",
+                    can_play=False,
+                    can_expand=True,
                 )
+            )
 
         return ret
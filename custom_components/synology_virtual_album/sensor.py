@@ -3,20 +3,23 @@ import zoneinfo
 
 from homeassistant.components.sensor import SensorDeviceClass, SensorEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import Event, EventStateChangedData, HomeAssistant, callback
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.util.dt import get_age
+from homeassistant.util import dt as dt_util
 
 from .const import (
     CONF_CURRENT_IMAGE,
     CONF_VIRTUAL_ALBUM_ID,
     CONF_VIRTUAL_ALBUM_NAME,
-    EVENT_CURRENT_PHOTO_CHANGED,
+    SIGNAL_CURRENT_PHOTO_CHANGED,
 )
 from .synology_photos import is_this_week, is_today
 
 ATTR_DESCRIPTION = "Description"
 
+_UTC = zoneinfo.ZoneInfo("UTC")
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -45,9 +48,16 @@ class PhotoDateSensor(SensorEntity):
             ATTR_DESCRIPTION: None,
         }
         self._state: date | None = None
+        self._signal = SIGNAL_CURRENT_PHOTO_CHANGED.format(
+            entry.data.get(CONF_VIRTUAL_ALBUM_ID)
+        )
 
-        hass.bus.async_listen(
-            EVENT_CURRENT_PHOTO_CHANGED, self._async_update_image_description
+    async def async_added_to_hass(self) -> None:
+        """Subscribe to current photo changes for this album."""
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass, self._signal, self._async_update_image_description
+            )
         )
 
     @property
@@ -56,31 +66,31 @@ class PhotoDateSensor(SensorEntity):
         return self._state
 
     @callback
-    def _async_update_image_description(
-        self, event: Event[EventStateChangedData]
-    ) -> None:
+    def _async_update_image_description(self, photo_info: dict) -> None:
         photo_date = None
 
-        if time_str := event.data.get("time"):
+        if time_str := photo_info.get("time"):
             photo_date = datetime.fromtimestamp(time_str)
 
         date_text = ""
 
         if photo_date:
+            photo_day = photo_date.date()
+            # Use the same system local time as the photo date and the is_today/is_this_week checks, so they all
+            # agree on which day it is
             today = date.today()
             years_ago = today.year - photo_date.year
 
-            date_with_timezone = photo_date.replace(tzinfo=zoneinfo.ZoneInfo("UTC"))
+            date_with_timezone = photo_date.replace(tzinfo=_UTC)
 
-            date_text = get_age(date_with_timezone) + " ago"
+            date_text = dt_util.get_age(date_with_timezone) + " ago"
 
-            if is_today(photo_date.date()):
+            if is_today(photo_day):
                 if years_ago == 0:
                     date_text = "Today"
                 else:
                     date_text += " today"
-            elif is_this_week(photo_date.date()):
-                years_ago = today.year - photo_date.year
+            elif is_this_week(photo_day):
                 if years_ago == 0:
                     date_text = "This week"
                 else:
@@ -3,18 +3,80 @@
 Ideally this would be merged into the base library
 """
 
-from collections.abc import AsyncGenerator, AsyncIterator
+import asyncio
+from collections import defaultdict
+from collections.abc import AsyncGenerator
 from dataclasses import dataclass
-import datetime
+from functools import lru_cache
+import mimetypes
+import time
 
+from synology_dsm import SynologyDSM
 from synology_dsm.api.photos import SynoPhotos
 from synology_dsm.api.photos.model import SynoPhotosAlbum, SynoPhotosItem
 
+# The extra fields requested for items, already encoded the way the DSM api expects them
+_GET_INFO_ADDITIONAL = '["description","tag","exif","resolution","orientation","gps","video_meta","video_convert","thumbnail","address","geocoding_id","rating","motion_photo","provider_user_id","person"]'
+_LIST_ITEMS_ADDITIONAL = '["thumbnail"]'
 
-@dataclass
+
+@lru_cache(maxsize=64)
+def _mime_type_for_extension(extension: str) -> str | None:
+    return mimetypes.guess_type("file." + extension)[0]
+
+
+def guess_mime_type(file_name: str) -> str | None:
+    """Returns the mime type for a file name, only guessing once for each extension."""
+    _, dot, extension = file_name.rpartition(".")
+    if not dot:
+        return None
+    return _mime_type_for_extension(extension.lower())
+
+
+def _response_list(raw_data: bytes | dict | str) -> list[dict] | None:
+    """Returns the list of results from a raw DSM response, or None if it isn't a valid response."""
+    if not isinstance(raw_data, dict) or (data := raw_data.get("data")) is None:
+        return None
+    return data["list"]
+
+
+@dataclass(slots=True)
 class SynoPhotosItemEx(SynoPhotosItem):
-    time: datetime.datetime
+    # Capture time, in seconds since the epoch
+    time: int
     source_album_id: int
+    mime_type: str | None
+
+    @classmethod
+    def from_raw(
+        cls, raw_item: dict, passphrase: str, source_album_id: int
+    ) -> "SynoPhotosItemEx":
+        """Builds an item from an entry in a raw item list response.
+
+        This parses the fields the same way SynoPhotos._raw_data_to_items does, so there's no need to build a base
+        item first and copy it over.
+        """
+        thumbnail = raw_item["additional"]["thumbnail"]
+        if thumbnail["xl"] == "ready":
+            thumbnail_size = "xl"
+        elif thumbnail["m"] == "ready":
+            thumbnail_size = "m"
+        else:
+            thumbnail_size = "sm"
+
+        return cls(
+            raw_item["id"],
+            raw_item["type"],
+            raw_item["filename"],
+            raw_item["filesize"],
+            thumbnail["cache_key"],
+            thumbnail_size,
+            raw_item["owner_user_id"] == 0,
+            passphrase,
+            raw_item["time"],
+            source_album_id,
+            guess_mime_type(raw_item["filename"]),
+        )
 
 
 class SynoPhotosEx(SynoPhotos):
@@ -22,29 +84,53 @@ class SynoPhotosEx(SynoPhotos):
 
     BROWSE_NORMAL_ALBUM_API_KEY = "SYNO.Foto.Browse.NormalAlbum"
 
-    async def get_info(self, item: SynoPhotosItem) -> dict | None:
-        """Returns extended info for a photo item."""
-        params = {
-            "id": f"[{item.item_id}]",
-            "additional": '["description","tag","exif","resolution","orientation","gps","video_meta","video_convert","thumbnail","address","geocoding_id","rating","motion_photo","provider_user_id","person"]',
-        }
+    # The maximum number of items to request extended info for in one call
+    INFO_BATCH_SIZE = 50
 
-        if item.passphrase:
-            params["passphrase"] = item.passphrase
+    # How long the full album list, read when an album can't be found by id, is reused
+    ALBUM_CACHE_SECONDS = 600
 
-        raw_data = await self._dsm.get(
-            self.BROWSE_ITEM_API_KEY,
-            "get",
-            params,
-        )
-        if not isinstance(raw_data, dict):
-            return None
-        if (data := raw_data.get("data")) is None:
-            return None
-        if len(data["list"]) == 1:
-            return data["list"][0]
+    def __init__(self, dsm: SynologyDSM) -> None:
+        """Initialize the photos api."""
+        super().__init__(dsm)
+        self._album_cache: dict[int, SynoPhotosAlbum] | None = None
+        self._album_cache_expiry = 0.0
+        self._album_cache_lock = asyncio.Lock()
 
-        return None
+    async def get_info(self, item: SynoPhotosItem) -> dict | None:
+        """Returns extended info for a photo item."""
+        return (await self.get_info_many([item])).get(item.item_id)
+
+    async def get_info_many(self, items: list[SynoPhotosItem]) -> dict[int, dict]:
+        """Returns extended info for photo items, keyed by item id, requesting them in batches."""
+        # Items from shared albums need their passphrase with the request, so only batch items with the same one
+        by_passphrase: defaultdict[str, list[SynoPhotosItem]] = defaultdict(list)
+        for item in items:
+            by_passphrase[item.passphrase].append(item)
+
+        ret: dict[int, dict] = {}
+
+        for passphrase, passphrase_items in by_passphrase.items():
+            for start in range(0, len(passphrase_items), self.INFO_BATCH_SIZE):
+                batch = passphrase_items[start : start + self.INFO_BATCH_SIZE]
+                params = {
+                    "id": "[" + ",".join(str(item.item_id) for item in batch) + "]",
+                    "additional": _GET_INFO_ADDITIONAL,
+                }
+
+                if passphrase:
+                    params["passphrase"] = passphrase
+
+                raw_data = await self._dsm.get(
+                    self.BROWSE_ITEM_API_KEY,
+                    "get",
+                    params,
+                )
+                ret.update(
+                    {info["id"]: info for info in _response_list(raw_data) or ()}
+                )
+
+        return ret
 
     async def get_album(self, album_id: int) -> SynoPhotosAlbum | None:
         """Get an album by id."""
@@ -53,11 +139,11 @@ class SynoPhotosEx(SynoPhotos):
             "get",
             {"id": f"[{album_id}]", "category": "normal_share_with_me"},
         )
-        if not isinstance(raw_data, dict) or (data := raw_data.get("data")) is None:
+        if (albums := _response_list(raw_data)) is None:
             return None
 
-        if len(data["list"]) == 1:
-            album = data["list"][0]
+        if len(albums) == 1:
+            album = albums[0]
             return SynoPhotosAlbum(
                 album["id"],
                 album["name"],
@@ -65,12 +151,20 @@ class SynoPhotosEx(SynoPhotos):
                 album["passphrase"],
             )
 
-        # FIXME: Sometimes the above call does not find the album by ID. Why? As a temporary fix, iterate all albums in that case.
-        async for album in self.get_albums_chunked():
-            if album.album_id == album_id:
-                return album
-
-        return None
+        # FIXME: Sometimes the above call does not find the album by ID. Why? As a temporary fix, look through all
+        # the albums in that case. Reading them all can take many requests, so keep them around for later misses.
+        # Source albums are looked up concurrently, so only let one of them read the list and the rest wait for it.
+        async with self._album_cache_lock:
+            if (
+                self._album_cache is None
+                or self._album_cache_expiry <= time.monotonic()
+            ):
+                self._album_cache = {
+                    album.album_id: album async for album in self.get_albums_chunked()
+                }
+                self._album_cache_expiry = time.monotonic() + self.ALBUM_CACHE_SECONDS
+
+        return self._album_cache.get(album_id)
 
     async def get_items_from_album_ex(
         self, album: SynoPhotosAlbum, offset: int = 0, limit: int = 100
@@ -79,7 +173,7 @@ class SynoPhotosEx(SynoPhotos):
         params = {
             "offset": offset,
             "limit": limit,
-            "additional": '["thumbnail"]',
+            "additional": _LIST_ITEMS_ADDITIONAL,
         }
         if album.passphrase:
             params["passphrase"] = album.passphrase
@@ -92,42 +186,14 @@ class SynoPhotosEx(SynoPhotos):
             params,
         )
 
-        ret: list[SynoPhotosItemEx] = []
-
-        if isinstance(raw_data, dict):
-            if data := raw_data.get("data"):
-                album_items = self._raw_data_to_items(raw_data, album.passphrase)
-                raw_items = data["list"]
-
-                if album_items and raw_items:
-                    for item, raw_item in zip(album_items, raw_items, strict=True):
-                        ex = SynoPhotosItemEx(
-                            item.item_id,
-                            item.item_type,
-                            item.file_name,
-                            item.file_size,
-                            item.thumbnail_cache_key,
-                            item.thumbnail_size,
-                            item.is_shared,
-                            item.passphrase,
-                            datetime.datetime.fromtimestamp(raw_item["time"]),
-                            album.album_id,
-                        )
-                        ret.append(ex)
-
-        return ret
+        if (raw_items := _response_list(raw_data)) is None:
+            return None
 
-    async def get_items_from_album_chunked(
-        self, album: SynoPhotosAlbum, chunk_size=100
-    ) -> AsyncIterator[list[SynoPhotosItemEx]]:
-        """Replacement for get_items_from_album, to avoid the busywork of the caller managing the offset."""
-        cur_offset = 0
+        from_raw = SynoPhotosItemEx.from_raw
+        passphrase = album.passphrase
+        album_id = album.album_id
 
-        while items := await self.get_items_from_album_ex(
-            album, cur_offset, chunk_size
-        ):
-            yield items
-            cur_offset += len(items)
+        return [from_raw(raw_item, passphrase, album_id) for raw_item in raw_items]
 
     async def get_albums_chunked(
         self, chunk_size=100
@@ -1,18 +1,26 @@
 """Helpers for interacting with the Synology DSM integration."""
 
-from asyncio import Task
+import asyncio
 from calendar import isleap
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
 import datetime
+from enum import Enum, auto
+import heapq
+from itertools import islice
 import logging
 import random
+import time
 from typing import TypedDict
-from urllib.parse import urlparse
+
+from synology_dsm.api.photos.model import SynoPhotosAlbum
 
 from homeassistant.components.synology_dsm import SynologyDSMConfigEntry
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import ServiceValidationError
 from homeassistant.helpers import device_registry as dr
+from homeassistant.helpers.dispatcher import async_dispatcher_send
 from homeassistant.helpers.event import (
     Event,
     EventStateChangedData,
@@ -29,12 +37,27 @@ from .const import (
     CONF_VIRTUAL_ALBUM_ID,
     CONF_WEEKLY_IMAGES,
     DOMAIN,
-    EVENT_CURRENT_PHOTO_CHANGED,
+    SIGNAL_CURRENT_PHOTO_CHANGED,
 )
 from .synology_dsm_photos_ex import SynoPhotosEx, SynoPhotosItemEx
 
 _LOGGER = logging.getLogger(__package__)
 
+# The maximum number of requests to have in flight at once when reading the source albums
+MAX_CONCURRENT_REQUESTS = 8
+
+# The number of items to request from the DSM at a time
+ITEMS_CHUNK_SIZE = 100
+
+# How long to wait after a photo is viewed before writing the viewed times, so they're written in batches
+STORE_WRITE_DELAY_SECONDS = 600
+
+# How long a fetched album list is reused before asking the DSM again
+ALBUM_CACHE_SECONDS = 60
+
+# Mapping from a DSM device id to the expiry time and albums last fetched for it
+_album_cache: dict[str, tuple[float, list[SynoPhotosAlbum]]] = {}
+
 
 class StorageData(TypedDict):
     # The item ids of the current album images
@@ -64,6 +87,30 @@ def get_photos(hass: HomeAssistant, dsm_device_id: str) -> SynoPhotosEx | None:
     return None
 
 
+async def get_albums_cached(
+    hass: HomeAssistant, dsm_device_id: str
+) -> list[SynoPhotosAlbum] | None:
+    """Returns the albums for a DSM, reusing the last result if it was fetched recently.
+
+    Returns None if the albums couldn't be read. Failures aren't cached, so the next call tries again.
+    """
+    if (cached := _album_cache.get(dsm_device_id)) and cached[0] > time.monotonic():
+        return cached[1]
+
+    if not (photos := get_photos(hass, dsm_device_id)):
+        return None
+    if (albums := await photos.get_albums()) is None:
+        return None
+
+    _album_cache[dsm_device_id] = (time.monotonic() + ALBUM_CACHE_SECONDS, albums)
+    return albums
+
+
+def invalidate_album_cache(dsm_device_id: str | None) -> None:
+    """Forgets any cached albums for a DSM, so the next request fetches them again."""
+    _album_cache.pop(dsm_device_id, None)
+
+
 def create_store(hass: HomeAssistant, config_entry: ConfigEntry) -> Store | None:
     if album_id := config_entry.data.get(CONF_VIRTUAL_ALBUM_ID):
         store_key = DOMAIN + "_" + album_id
@@ -94,14 +141,18 @@ def _make_day_comparable(
 
 def is_today(compare_date: datetime.date) -> bool:
     """Return true if date is the same month and day as today, ignoring the year."""
-    (today_clean, compare_clean) = _make_day_comparable(
-        datetime.date.today(), compare_date
-    )
+    today = datetime.date.today()
+    if compare_date.month == today.month and compare_date.day == today.day:
+        return True
 
-    return (
-        compare_clean.month == today_clean.month
-        and compare_clean.day == today_clean.day
-    )
+    # A leap day matches Feb 28th when the other date isn't in a leap year
+    if compare_date.month == 2 and today.month == 2:
+        if compare_date.day == 29 and today.day == 28:
+            return not isleap(today.year)
+        if compare_date.day == 28 and today.day == 29:
+            return not isleap(compare_date.year)
+
+    return False
 
 
 def is_this_week(compare_date: datetime.date):
@@ -125,6 +176,84 @@ def is_this_week(compare_date: datetime.date):
     return delta <= 7
 
 
+@dataclass(frozen=True, slots=True)
+class _Today:
+    """Today's date, with the values needed to compare it against many other dates precomputed."""
+
+    month: int
+    day: int
+    is_leap: bool
+    # Day of the year (1-365/366)
+    yday: int
+    # Day of the year if today were in a non-leap year (1-365)
+    common_yday: int
+    days_in_year: int
+
+    @classmethod
+    def from_date(cls, today: datetime.date) -> "_Today":
+        is_leap = isleap(today.year)
+        yday = today.timetuple().tm_yday
+        return cls(
+            today.month,
+            today.day,
+            is_leap,
+            yday,
+            _common_yday(today.month, today.day, yday, is_leap),
+            366 if is_leap else 365,
+        )
+
+
+def _common_yday(month: int, day: int, yday: int, is_leap: bool) -> int:
+    """Returns the day of the year as if the date were in a non-leap year, with a leap day treated as Feb 28th."""
+    if is_leap and (month, day) >= (2, 29):
+        return yday - 1
+    return yday
+
+
+class _DateGroup(Enum):
+    """How an item's date relates to today, ignoring the year."""
+
+    TODAY = auto()
+    THIS_WEEK = auto()
+    OTHER = auto()
+
+
+def _classify_date(compare: time.struct_time, today: _Today) -> _DateGroup:
+    """Same as checking is_today then is_this_week, but for a local time and using precomputed values for today."""
+    compare_leap = isleap(compare.tm_year)
+
+    if compare.tm_mon == today.month and compare.tm_mday == today.day:
+        return _DateGroup.TODAY
+
+    # A leap day matches Feb 28th when the other date isn't in a leap year
+    if compare.tm_mon == 2 and today.month == 2:
+        if compare.tm_mday == 29 and today.day == 28 and not today.is_leap:
+            return _DateGroup.TODAY
+        if compare.tm_mday == 28 and today.day == 29 and not compare_leap:
+            return _DateGroup.TODAY
+
+    compare_day = compare.tm_yday
+
+    # If only one of the dates is in a leap year, compare them both as if they were in a non-leap year
+    if compare_leap == today.is_leap:
+        today_day = today.yday
+        days_in_year = today.days_in_year
+    else:
+        compare_day = _common_yday(
+            compare.tm_mon, compare.tm_mday, compare_day, compare_leap
+        )
+        today_day = today.common_yday
+        days_in_year = 365
+
+    # Handle the wraparound case, the same as is_this_week
+    if compare_day < today_day:
+        today_day = today_day - days_in_year
+
+    if compare_day - today_day <= 7:
+        return _DateGroup.THIS_WEEK
+    return _DateGroup.OTHER
+
+
 class SynologyPhotos:
     def __init__(
         self,
@@ -152,13 +281,22 @@ class SynologyPhotos:
         self._hass = hass
         self.config_entry = config_entry
         self._photos: SynoPhotosEx = photos
-        self._current_album_items: list[SynoPhotosItemEx] = []
+        self._album_items: list[SynoPhotosItemEx] = []
+        self._items_by_thumb: dict[str, SynoPhotosItemEx] = {}
+        self._image_items: list[SynoPhotosItemEx] = []
+        self._last_image_url: str | None = None
         self._last_viewed: dict[int, int] = {}
         self._store = store
+        # The stored data, loaded on first use and then kept up to date in memory so it's only read from disk once
+        self._store_cache: StorageData | None = None
+        self._store_loaded = False
+        self._store_write_scheduled = False
+        self._shut_down = False
         self._photos = photos
 
+        self._unsub_current_image: Callable[[], None] | None = None
         if current_image := self.config_entry.data.get(CONF_CURRENT_IMAGE):
-            async_track_state_change_event(
+            self._unsub_current_image = async_track_state_change_event(
                 hass,
                 current_image,
                 self._async_update_current_image,
@@ -166,7 +304,29 @@ class SynologyPhotos:
 
         self._hass.loop.create_task(self._async_init())
 
+    @property
+    def _current_album_items(self) -> list[SynoPhotosItemEx]:
+        return self._album_items
+
+    @_current_album_items.setter
+    def _current_album_items(self, items: list[SynoPhotosItemEx]) -> None:
+        # Keep the items indexed by thumbnail too, so the current image can be looked up without scanning the album
+        self._album_items = items
+        self._items_by_thumb = {item.thumbnail_cache_key: item for item in items}
+        # The media source only shows images, so filter them out once here rather than on every browse
+        self._image_items = [
+            item
+            for item in items
+            if item.mime_type and item.mime_type.startswith("image/")
+        ]
+
     async def shutdown(self):
+        # Stop listening before the final write, so a reloaded entry's store can't be overwritten by this instance
+        self._shut_down = True
+        if self._unsub_current_image:
+            self._unsub_current_image()
+            self._unsub_current_image = None
+
         if len(self._last_viewed) > 0:
             _LOGGER.debug("Writing last viewed times on shutdown")
             await self._update_store()
@@ -181,16 +341,16 @@ class SynologyPhotos:
                     len(current_album),
                 )
 
-                source_items = await self._get_source_items()
+                source_items, _ = await self._get_source_items()
 
                 _LOGGER.debug("Found %d source images", len(source_items))
 
-                for item_id in current_album:
-                    item = next(
-                        (item for item in source_items if item.item_id == item_id), None
-                    )
-                    if item:
-                        self._current_album_items.append(item)
+                items_by_id = {item.item_id: item for item in source_items}
+                self._current_album_items = [
+                    items_by_id[item_id]
+                    for item_id in current_album
+                    if item_id in items_by_id
+                ]
 
                 _LOGGER.debug(
                     "Matched %d images from previous album",
@@ -200,6 +360,9 @@ class SynologyPhotos:
                 _LOGGER.debug("No previously generated album images found")
 
     async def _read_store(self) -> StorageData | None:
+        if self._store_loaded:
+            return self._store_cache
+
         stored = await self._store.async_load()
 
         # JSON only supports string keys, so convert any loaded item ids back to integers
@@ -214,13 +377,19 @@ class SynologyPhotos:
                 0 if "last_viewed" not in stored else len(stored["last_viewed"]),
             )
 
+        self._store_cache = stored
+        self._store_loaded = True
+
         return stored
 
-    async def _update_store(self):
-        current_data = await self._read_store()
+    @callback
+    def _data_to_save(self) -> StorageData:
+        """Merges any new viewed times into the stored data and returns it for saving."""
+        current_data = self._store_cache
 
         if not current_data:
             current_data = {"last_viewed": {}, "current_album": []}
+            self._store_cache = current_data
 
         _LOGGER.debug(
             "Writing store with %d new album images, %d new/updated viewed times",
@@ -232,10 +401,27 @@ class SynologyPhotos:
             item.item_id for item in self._current_album_items
         ]
 
-        current_data["last_viewed"].update(self._last_viewed)
+        current_data.setdefault("last_viewed", {}).update(self._last_viewed)
         self._last_viewed.clear()
+        self._store_write_scheduled = False
 
-        await self._store.async_save(current_data)
+        return current_data
+
+    async def _update_store(self):
+        # Make sure the existing data is loaded, so we merge into it rather than replacing it
+        await self._read_store()
+        await self._store.async_save(self._data_to_save())
+
+    @callback
+    def _schedule_store_write(self) -> None:
+        """Writes the new viewed times after a delay, batching up any that come in before then into one write."""
+        if (
+            self._store_loaded
+            and not self._store_write_scheduled
+            and not self._shut_down
+        ):
+            self._store_write_scheduled = True
+            self._store.async_delay_save(self._data_to_save, STORE_WRITE_DELAY_SECONDS)
 
     async def _async_update_current_image(
         self, event: Event[EventStateChangedData]
@@ -243,121 +429,223 @@ class SynologyPhotos:
         if not (new_state := event.data.get("new_state")):
             return
 
+        # The state also changes when only the attributes do, and can be unavailable/unknown. Skip those.
         image_url = new_state.state
-        url = urlparse(image_url)
+        if image_url == self._last_image_url or not image_url.startswith("http"):
+            return
 
         item: SynoPhotosItemEx | None = None
 
         # This is similar to SynologyPhotosMediaSourceIdentifier, but not quite. Just parse it out manually.
         # http://[host]/synology_dsm/[server_id]]/[thumbnail_key]/[image_name]/?authSig=[key]
-        parts = url.path.split("/")
-        if len(parts) > 3:
-            thumbnail_cache_key = parts[3]
-
-            item = next(
-                (
-                    item
-                    for item in self._current_album_items
-                    if item.thumbnail_cache_key == thumbnail_cache_key
-                ),
-                None,
-            )
+        # The thumbnail key is always followed by the image name, so it's only taken when there's a part after it.
+        parts = image_url.split("/", 6)
+        if len(parts) > 6:
+            item = self._items_by_thumb.get(parts[5])
 
         if item:
+            # Only remember the url once it's been matched, so an image that arrives before the album is loaded is
+            # looked up again on its next update
+            self._last_image_url = image_url
             self._last_viewed[item.item_id] = datetime.date.today().toordinal()
+            self._schedule_store_write()
 
             photo_info = await self._photos.get_info(item)
 
             if not photo_info:
                 photo_info = {}
 
-            self._hass.bus.fire(EVENT_CURRENT_PHOTO_CHANGED, photo_info)
+            async_dispatcher_send(
+                self._hass,
+                SIGNAL_CURRENT_PHOTO_CHANGED.format(
+                    self.config_entry.data.get(CONF_VIRTUAL_ALBUM_ID)
+                ),
+                photo_info,
+            )
         else:
             _LOGGER.warning("Couldn't find cached info for image: %s", image_url)
 
-    def _get_subset(
-        self, photos: list[SynoPhotosItemEx], max_count: int
-    ) -> list[SynoPhotosItemEx]:
-        if len(photos) <= max_count:
-            return photos
+    async def _get_source_items(
+        self, on_page: Callable[[list[SynoPhotosItemEx]], None] | None = None
+    ) -> tuple[list[SynoPhotosItemEx], bool]:
+        """Returns all the items in the source albums, and whether every album and page was read successfully.
 
-        return photos[:max_count]
+        The read is never reported as complete when there are no source albums configured.
 
-    async def _get_source_items(self) -> list[SynoPhotosItemEx]:
-        source_items: list[SynoPhotosItemEx] = []
+        If on_page is given it's called with each page of items as it arrives, so processing can overlap with the
+        requests still in flight.
+        """
+        # With no source albums there's nothing to say which images are still in the library
+        if not (source_albums := self.config_entry.data.get(CONF_SOURCE_ALBUMS)):
+            return [], False
 
-        # Build up a list of all the photos in the source albums. This could be thousands of items,
-        # so it can take seconds for this to complete.
-        if source_albums := self.config_entry.data.get(CONF_SOURCE_ALBUMS):
-            for source_album_str in source_albums:
-                source_album_id = int(source_album_str)
+        complete = True
 
-                if source_album := await self._photos.get_album(source_album_id):
-                    async for items in self._photos.get_items_from_album_chunked(
-                        source_album
-                    ):
-                        source_items.extend(items)
+        # Build up a list of all the photos in the source albums. This could be thousands of items, so rather than
+        # reading one page at a time, request all the pages at once (with a limit on how many are in flight).
+        semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
 
-        return source_items
+        async def limited[T](coro: Awaitable[T]) -> T:
+            async with semaphore:
+                return await coro
 
-    async def rebuild_virtual_album(self) -> None:
-        _LOGGER.debug("Rebuilding album")
+        async def get_page(
+            album: SynoPhotosAlbum, offset: int
+        ) -> list[SynoPhotosItemEx] | None:
+            nonlocal complete
+            page = await self._photos.get_items_from_album_ex(
+                album, offset, ITEMS_CHUNK_SIZE
+            )
+            if page is None:
+                complete = False
+            elif page and on_page:
+                on_page(page)
+            return page
+
+        async def get_album_items(album: SynoPhotosAlbum) -> list[SynoPhotosItemEx]:
+            # Always ask for at least the first page, in case the item count is out of date
+            offsets = range(0, max(album.item_count, 1), ITEMS_CHUNK_SIZE)
+            pages = await asyncio.gather(
+                *(limited(get_page(album, offset)) for offset in offsets)
+            )
+            items = [item for page in pages if page for item in page]
+
+            # The item count could also be too low, so keep reading if the last page was full. The offsets follow on
+            # from the pages requested rather than the items read, in case any of those pages failed.
+            next_offset = offsets[-1] + ITEMS_CHUNK_SIZE
+            last_page = pages[-1]
+            while last_page and len(last_page) == ITEMS_CHUNK_SIZE:
+                last_page = await limited(get_page(album, next_offset))
+                next_offset += ITEMS_CHUNK_SIZE
+                items.extend(last_page or [])
+
+            return items
+
+        albums = await asyncio.gather(
+            *(
+                limited(self._photos.get_album(int(source_album)))
+                for source_album in source_albums
+            )
+        )
 
-        config_data = self.config_entry.data
+        if not all(albums):
+            complete = False
 
-        source_items = await self._get_source_items()
+        album_items = await asyncio.gather(
+            *(get_album_items(album) for album in albums if album)
+        )
 
-        _LOGGER.debug("Found %d source images", len(source_items))
+        return [item for items in album_items for item in items], complete
 
-        # Shuffle the items. We're about to sort them in the next step, but it's a stable sort, so this takes care of
-        # randomizing the order of anything that's never been viewed.
-        random.shuffle(source_items)
+    async def rebuild_virtual_album(self) -> None:
+        _LOGGER.debug("Rebuilding album")
 
-        # Load the last viewed dates and sort the items so the most recently viewed are last
-        if stored_data := await self._read_store():
-            if last_viewed := stored_data.get("last_viewed"):
-                _LOGGER.debug("Found %d last viewed times", len(last_viewed))
-                source_items.sort(key=lambda item: last_viewed.get(item.item_id, 0))
+        config_data = self.config_entry.data
+        invalidate_album_cache(config_data.get(CONF_SYNOLOGY_DSM))
 
         max_album_items = int(config_data.get(CONF_MAX_ALBUM_IMAGES, 0))
-        daily_max = min(config_data.get(CONF_DAILY_IMAGES, 0), max_album_items)
-        weekly_max = min(config_data.get(CONF_WEEKLY_IMAGES, 0), max_album_items)
-
-        new_items: list[SynoPhotosItemEx] = []
-
-        def get_max_items(max_items):
-            return min(max_items, max_album_items - len(new_items))
+        daily_max = min(int(config_data.get(CONF_DAILY_IMAGES, 0)), max_album_items)
+        weekly_max = min(int(config_data.get(CONF_WEEKLY_IMAGES, 0)), max_album_items)
+        use_dates = daily_max > 0 or weekly_max > 0
+
+        # Work out which items are from this day or week as each page arrives, rather than in another pass after
+        # they've all been read
+        today = _Today.from_date(datetime.date.today())
+        this_day_ids: set[int] = set()
+        this_week_ids: set[int] = set()
+
+        def classify_page(page: list[SynoPhotosItemEx]) -> None:
+            for item in page:
+                group = _classify_date(time.localtime(item.time), today)
+                if group is _DateGroup.TODAY:
+                    this_day_ids.add(item.item_id)
+                elif group is _DateGroup.THIS_WEEK:
+                    this_week_ids.add(item.item_id)
+
+        source_items, source_complete = await self._get_source_items(
+            classify_page if use_dates else None
+        )
 
-        if daily_max > 0 or weekly_max > 0:
-            this_day_items: list[SynoPhotosItemEx] = []
-            this_week_items: list[SynoPhotosItemEx] = []
+        _LOGGER.debug("Found %d source images", len(source_items))
 
-            for item in source_items:
-                if is_today(item.time.date()):
-                    this_day_items.append(item)
-                elif is_this_week(item.time.date()):
-                    this_week_items.append(item)
+        # The same image can be in more than one source album, so only keep one of each
+        items_by_id = {item.item_id: item for item in source_items}
 
+        # Load the last viewed dates and order the items so the most recently viewed are last. The random second key
+        # takes care of randomizing the order of anything viewed on the same day, or never viewed.
+        last_viewed: dict[int, int] = {}
+        if stored_data := await self._read_store():
+            last_viewed = stored_data.get("last_viewed") or {}
+            _LOGGER.debug("Found %d last viewed times", len(last_viewed))
+
+            # Forget the viewed times for images that are no longer in any source album, so the stored times don't
+            # grow forever. Only do this after a complete read that found images, or a failed request or empty album
+            # list would forget images still there.
+            if source_complete and items_by_id and last_viewed:
+                last_viewed = {
+                    item_id: viewed
+                    for item_id, viewed in last_viewed.items()
+                    if item_id in items_by_id
+                }
+                stored_data["last_viewed"] = last_viewed
+
+        get_last_viewed = last_viewed.get
+        sort_keys = {
+            item_id: (get_last_viewed(item_id, 0), random.random())
+            for item_id in items_by_id
+        }
+
+        def sort_key(item: SynoPhotosItemEx) -> tuple[int, float]:
+            return sort_keys[item.item_id]
+
+        # Only the start of the order is ever used. Every day and week item is a candidate wherever it falls, but
+        # everything else used to fill the album is within the first max + day max + week max items, so there's no
+        # need to sort the whole list.
+        ranked = heapq.nsmallest(
+            max_album_items + daily_max + weekly_max,
+            items_by_id.values(),
+            key=sort_key,
+        )
+        ranked_ids = {item.item_id for item in ranked}
+        ranked.extend(
+            items_by_id[item_id]
+            for item_id in this_day_ids | this_week_ids
+            if item_id in items_by_id and item_id not in ranked_ids
+        )
+        ranked.sort(key=sort_key)
+
+        # Make one pass over the ordered items, taking the day and week items up to their limits and holding on to
+        # enough of the rest to fill the album. Anything from this day or week past its limit is treated like any
+        # other item. This stops once every group is full.
+        this_day_items: list[SynoPhotosItemEx] = []
+        this_week_items: list[SynoPhotosItemEx] = []
+        other_items: list[SynoPhotosItemEx] = []
+
+        for item in ranked:
+            item_id = item.item_id
+            if item_id in this_day_ids and len(this_day_items) < daily_max:
+                this_day_items.append(item)
+            elif item_id in this_week_ids and len(this_week_items) < weekly_max:
+                this_week_items.append(item)
+            elif len(other_items) < max_album_items:
+                other_items.append(item)
+            elif (
+                len(this_day_items) >= daily_max and len(this_week_items) >= weekly_max
+            ):
+                break
+
+        if use_dates:
             _LOGGER.debug(
                 "Found %d images from this day and %d from this week (%d day max, %d week max)",
-                len(this_day_items),
-                len(this_week_items),
+                len(this_day_ids),
+                len(this_week_ids),
                 daily_max,
                 weekly_max,
             )
 
-            new_items += self._get_subset(this_day_items, get_max_items(daily_max))
-            new_items += self._get_subset(this_week_items, get_max_items(weekly_max))
-
-            # Remove any images we used from the source, so we won't add them again
-            unused_items: list[SynoPhotosItemEx] = []
-            for item in source_items:
-                if item not in new_items:
-                    unused_items.append(item)
-            source_items = unused_items
-
-        # Add any remaining items up to the max
-        new_items += self._get_subset(source_items, get_max_items(max_album_items))
+        new_items = this_day_items
+        new_items.extend(islice(this_week_items, max_album_items - len(new_items)))
+        new_items.extend(islice(other_items, max_album_items - len(new_items)))
 
         self._current_album_items = new_items
 
@@ -369,8 +657,11 @@ class SynologyPhotos:
 
         await self._update_store()
 
-    async def get_virtual_album_items(self) -> list[SynoPhotosItemEx]:
+    async def get_virtual_album_items(
+        self, images_only: bool = False
+    ) -> list[SynoPhotosItemEx]:
+        """Returns the items in the virtual album, optionally only the images."""
         if not self._current_album_items:
             await self.rebuild_virtual_album()
 
-        return self._current_album_items
+        return self._image_items if images_only else self._current_album_items